@@ -1,10 +1,10 @@
 from http.server import BaseHTTPRequestHandler
+import concurrent.futures
 import json
 import yaml
 import base64
 import os
 import sys
-import tempfile
 import zipfile
 from datetime import datetime
 from io import BytesIO
@@ -15,19 +15,123 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+# pdf_generator (and with it ReportLab) is only imported inside the worker
+# initializer: the parent process never renders, so importing it here would
+# just slow down server startup.
 try:
     from data_loader import DataLoader, ExcelStudentLoader
     from text_formatter import TextFormatter
-    from pdf_generator import TranscriptPDFGenerator
     from grades_processor import GradeValidator, RankingCalculator
 except ImportError as e:
     # Fallback for Vercel deployment
     sys.path.append('/var/task')
     from data_loader import DataLoader, ExcelStudentLoader
     from text_formatter import TextFormatter
-    from pdf_generator import TranscriptPDFGenerator
     from grades_processor import GradeValidator, RankingCalculator
 
+# Same fast-loader fallback as data_loader: the libyaml-backed safe loader
+# parses the YAML fields of every POST body, with the pure-Python loader as
+# the fallback when libyaml is unavailable.
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
+
+# Shared read-only state for batch worker processes, mirroring the pool setup
+# in main.py: batch-invariant data is shipped once per worker through the
+# initializer instead of being pickled into every per-student task.
+_WORKER_STATE = {}
+
+
+def _init_batch_worker(author_info_data, text_templates, year_info, all_rankings,
+                       total_students, run_timestamp):
+    """Initialize a batch worker process with the shared batch state."""
+    # Each worker pays the ReportLab import and cache warm-up cost exactly
+    # once, here, instead of on its first transcript
+    import pdf_generator
+    from pdf_generator import TranscriptPDFGenerator
+
+    pdf_generator.warm_up()
+
+    _WORKER_STATE['author_info'] = author_info_data
+    _WORKER_STATE['text_templates'] = text_templates
+    _WORKER_STATE['year_info'] = year_info
+    _WORKER_STATE['all_rankings'] = all_rankings
+    _WORKER_STATE['total_students'] = total_students
+    _WORKER_STATE['run_timestamp'] = run_timestamp
+    _WORKER_STATE['text_formatter'] = TextFormatter()
+
+    pdf_generator = TranscriptPDFGenerator()
+    yearname = year_info.get('year', year_info).get('yearname')
+    if yearname:
+        # Partially evaluate: the header subtitle only depends on the
+        # (batch-invariant) year name, so format it once per worker
+        _WORKER_STATE['render'] = pdf_generator.prepare(yearname)
+    else:
+        _WORKER_STATE['render'] = pdf_generator.generate_transcript
+
+
+def _render_batch_student(task):
+    """
+    Render one (pre-validated) student's transcript inside a batch worker.
+
+    Args:
+        task: Tuple of (student index, student Excel data)
+
+    Returns:
+        Tuple of (pdf_filename, pdf_bytes, student_name), or None on failure
+    """
+    i, student_excel_data = task
+    state = _WORKER_STATE
+
+    try:
+        print(f"\n--- Processing student {i+1}/{state['total_students']} ---")
+
+        # Combine student data with author data and year info
+        student_data = state['text_formatter'].combine_student_author_data(
+            {'student': student_excel_data['student']},
+            {'author': state['author_info']},
+            state['year_info']
+        )
+
+        firstname = student_data['student']['firstname']
+        lastname = student_data['student']['name']
+        student_name = f"{firstname} {lastname}"
+        print(f"👤 Student: {student_name}")
+        print(f"📚 Courses: {len(student_excel_data['grades'])}")
+
+        # Get student-specific rankings if enabled
+        all_rankings = state['all_rankings']
+        student_rankings = None
+        if all_rankings is not None:
+            student_rankings = {}
+            for course in student_excel_data['grades']:
+                if course in all_rankings and student_name in all_rankings[course]:
+                    student_rankings[course] = all_rankings[course][student_name]
+            print(f"🏅 Rankings: {len(student_rankings)} courses have rankings")
+
+        # Format text templates
+        formatted_texts = state['text_formatter'].format_all_templates(
+            student_data, state['text_templates'])
+
+        # Generate the PDF straight into memory — no temp file round-trip
+        pdf_filename = f"{firstname}_{lastname}_transcript_{state['run_timestamp']}_{i+1:03d}.pdf"
+        pdf_buffer = BytesIO()
+        state['render'](
+            formatted_texts, student_data, student_excel_data['grades'],
+            pdf_buffer, student_rankings
+        )
+
+        print(f"✅ Generated PDF for {student_name}")
+        return pdf_filename, pdf_buffer.getvalue(), student_name
+
+    except Exception as e:
+        print(f"❌ Error processing student {i+1}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
 
 class BatchTranscriptGenerator:
     """Main class for batch transcript generation operations."""
@@ -36,7 +140,6 @@ class BatchTranscriptGenerator:
         self.data_loader = DataLoader()
         self.excel_loader = ExcelStudentLoader()
         self.text_formatter = TextFormatter()
-        self.pdf_generator = TranscriptPDFGenerator()
         self.grade_validator = GradeValidator()
         self.ranking_calculator = RankingCalculator()
 
@@ -55,170 +158,166 @@ class BatchTranscriptGenerator:
         """
         print("=== BATCH TRANSCRIPT GENERATION ===")
         
-        # Create temporary files for Excel processing
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as excel_temp:
-            excel_temp.write(excel_data)
-            excel_temp_path = excel_temp.name
-            print(f"📊 Excel file saved to temp: {excel_temp_path}")
-            print(f"👤 Using author info from form data")
-        
-        try:
-            # Load students from Excel
-            students = self.excel_loader.load_students_from_excel(excel_temp_path)
-            print(f"✅ Loaded {len(students)} students from Excel")
-            
-            # Calculate subject rankings across all students if display_rank is True
-            all_rankings = {}
-            if display_rank:
-                print("📊 Calculating subject rankings...")
-                all_rankings = self.ranking_calculator.calculate_rankings(students)
-                print(f"✅ Rankings calculated for {len(all_rankings)} subjects")
-            else:
-                print("📊 Ranking display disabled, skipping rank calculation")
-            
-            # Load text templates
-            text_templates_path = os.path.join(parent_dir, 'assets', 'text.json')
-            print(f"Loading text templates from: {text_templates_path}")
-            text_templates = self.data_loader.load_text_templates(text_templates_path)
+        # Parse the workbook straight from memory — pandas accepts a
+        # file-like, so the uploaded bytes never touch disk
+        print(f"📊 Parsing Excel workbook from memory ({len(excel_data)} bytes)")
+        print(f"👤 Using author info from form data")
+
+        # Load students from Excel
+        students = self.excel_loader.load_students_from_excel(BytesIO(excel_data))
+        print(f"✅ Loaded {len(students)} students from Excel")
             
-            generated_pdfs = []
-            student_names = []
-            successful_count = 0
+        # Calculate subject rankings across all students if display_rank is True
+        all_rankings = {}
+        if display_rank:
+            print("📊 Calculating subject rankings...")
+            all_rankings = self.ranking_calculator.calculate_rankings(students)
+            print(f"✅ Rankings calculated for {len(all_rankings)} subjects")
+        else:
+            print("📊 Ranking display disabled, skipping rank calculation")
             
-            # Create in-memory ZIP file
-            zip_buffer = BytesIO()
+        # Load text templates
+        text_templates_path = os.path.join(parent_dir, 'assets', 'text.json')
+        print(f"Loading text templates from: {text_templates_path}")
+        text_templates = self.data_loader.load_text_templates(text_templates_path)
             
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for i, student_excel_data in enumerate(students):
-                    try:
-                        print(f"\n--- Processing student {i+1}/{len(students)} ---")
-                        
-                        # Skip students with no grades
-                        if not student_excel_data['grades']:
-                            print(f"⚠️  Skipping student {i+1}: No grades found")
-                            continue
-                        
-                        # Set up year info if not provided
-                        if year_info_data is None:
-                            # Create year info based on Excel data if possible
-                            current_year_info = {'year': {}}
-                            
-                            # Use the program name detected during Excel loading if available
-                            if hasattr(self.excel_loader, 'program_name') and self.excel_loader.program_name:
-                                current_year_info['year']['yearname'] = self.excel_loader.program_name
-                            else:
-                                # Default fallback
-                                current_year_info['year']['yearname'] = 'First year of Master\'s degree in Computer Science'
-                            
-                            # Use the school year detected during Excel loading if available
-                            if hasattr(self.excel_loader, 'school_year') and self.excel_loader.school_year:
-                                current_year_info['year']['schoolyear'] = self.excel_loader.school_year
-                            else:
-                                # Default fallback
-                                current_year_info['year']['schoolyear'] = '2023-2024'
-                        else:
-                            current_year_info = year_info_data
-                        
-                        # Combine student data with author data and year info
-                        student_data = self.text_formatter.combine_student_author_data(
-                            {'student': student_excel_data['student']}, 
-                            {'author': author_info_data}, 
-                            current_year_info
-                        )
-                        
-                        student_name = f"{student_data['student']['firstname']} {student_data['student']['name']}"
-                        print(f"👤 Student: {student_name}")
-                        print(f"📚 Courses: {len(student_excel_data['grades'])}")
-                        
-                        # Validate grades data
-                        is_valid, errors = self.grade_validator.validate_grades_data(student_excel_data['grades'])
-                        if not is_valid:
-                            print(f"❌ Invalid grades data for student {i+1}: {'; '.join(errors)}")
-                            continue
-                        
-                        # Format text templates
-                        formatted_texts = self.text_formatter.format_all_templates(student_data, text_templates)
-                        
-                        # Create grades for PDF generation
-                        grades_for_pdf = student_excel_data['grades']
-                        
-                        # Get student-specific rankings if enabled
-                        student_rankings = None
-                        if display_rank:
-                            # Get student ID for ranking lookup
-                            student_id = f"{student_data['student']['firstname']} {student_data['student']['name']}"
-                            # Get student-specific rankings
-                            student_rankings = {}
-                            for course in student_excel_data['grades']:
-                                if course in all_rankings and student_id in all_rankings[course]:
-                                    student_rankings[course] = all_rankings[course][student_id]
-                            print(f"🏅 Rankings: {len(student_rankings)} courses have rankings")
-                        
-                        # Generate PDF filename
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        pdf_filename = f"{student_data['student']['firstname']}_{student_data['student']['name']}_transcript_{timestamp}_{i+1:03d}.pdf"
-                        
-                        # Create temporary file for PDF generation
-                        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as pdf_temp:
-                            pdf_temp_path = pdf_temp.name
-                        
-                        try:
-                            # Generate PDF using the correct method
-                            created_pdf = self.pdf_generator.generate_transcript(
-                                formatted_texts, student_data, grades_for_pdf, pdf_temp_path, student_rankings
-                            )
-                            
-                            # Read the generated PDF
-                            with open(created_pdf, 'rb') as pdf_file:
-                                pdf_content = pdf_file.read()
-                            
-                            # Add PDF to ZIP
-                            zip_file.writestr(pdf_filename, pdf_content)
-                            
-                        finally:
-                            # Clean up temporary PDF file
-                            if os.path.exists(pdf_temp_path):
-                                os.unlink(pdf_temp_path)
-                        
-                        student_names.append(student_name)
-                        successful_count += 1
-                        
-                        print(f"✅ Generated PDF for {student_name}")
-                        
-                    except Exception as e:
-                        print(f"❌ Error processing student {i+1}: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
+        # Set up year info if not provided. It only depends on what was
+        # detected during Excel loading, so build it once for the batch.
+        if year_info_data is None:
+            year_info = {'year': {}}
+
+            # Use the program name detected during Excel loading if available
+            if hasattr(self.excel_loader, 'program_name') and self.excel_loader.program_name:
+                year_info['year']['yearname'] = self.excel_loader.program_name
+            else:
+                # Default fallback
+                year_info['year']['yearname'] = 'First year of Master\'s degree in Computer Science'
+
+            # Use the school year detected during Excel loading if available
+            if hasattr(self.excel_loader, 'school_year') and self.excel_loader.school_year:
+                year_info['year']['schoolyear'] = self.excel_loader.school_year
+            else:
+                # Default fallback
+                year_info['year']['schoolyear'] = '2023-2024'
+        else:
+            year_info = year_info_data
+
+        # Pre-validate all students so known-bad rows never reach the workers
+        tasks = []
+        for i, student_excel_data in enumerate(students):
+            # Skip students with no grades
+            if not student_excel_data['grades']:
+                print(f"⚠️  Skipping student {i+1}: No grades found")
+                continue
+
+            is_valid, errors = self.grade_validator.validate_grades_data(student_excel_data['grades'])
+            if not is_valid:
+                print(f"❌ Invalid grades data for student {i+1}: {'; '.join(errors)}")
+                continue
+
+            tasks.append((i, student_excel_data))
+
+        student_names = []
+        successful_count = 0
+
+        # One timestamp for the whole run instead of a datetime.now per PDF
+        run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Create in-memory ZIP file. PDF rendering is CPU-bound and
+        # GIL-bound per document, so students are rendered in worker
+        # processes and the finished bytes are zipped as they arrive.
+        # ZIP_STORED: PDF streams are already deflated, so compressing
+        # them again burns CPU for ~no size win.
+        zip_buffer = BytesIO()
+
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+            with concurrent.futures.ProcessPoolExecutor(
+                    initializer=_init_batch_worker,
+                    initargs=(author_info_data, text_templates, year_info,
+                              all_rankings if display_rank else None,
+                              len(students), run_timestamp)) as executor:
+                for result in executor.map(_render_batch_student, tasks):
+                    if result is None:
                         continue
+                    pdf_filename, pdf_content, student_name = result
+                    zip_file.writestr(pdf_filename, pdf_content)
+                    student_names.append(student_name)
+                    successful_count += 1
+
+        # Get ZIP content
+        zip_content = zip_buffer.getvalue()
+
+        # Generate ZIP filename
+        zip_filename = f"batch_transcripts_{run_timestamp}.zip"
             
-            # Get ZIP content
-            zip_buffer.seek(0)
-            zip_content = zip_buffer.getvalue()
-            
-            # Generate ZIP filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            zip_filename = f"batch_transcripts_{timestamp}.zip"
-            
-            print(f"\n✅ BATCH GENERATION COMPLETED")
-            print(f"🎉 Successfully generated: {successful_count}/{len(students)} transcripts")
-            print(f"📦 ZIP file: {zip_filename}")
-            print(f"👥 Students: {', '.join(student_names)}")
+        print(f"\n✅ BATCH GENERATION COMPLETED")
+        print(f"🎉 Successfully generated: {successful_count}/{len(students)} transcripts")
+        print(f"📦 ZIP file: {zip_filename}")
+        print(f"👥 Students: {', '.join(student_names)}")
             
-            return zip_content, zip_filename, student_names, successful_count
+        return zip_content, zip_filename, student_names, successful_count
         
-        finally:
-            # Clean up temporary file
-            if os.path.exists(excel_temp_path):
-                os.unlink(excel_temp_path)
+# Shared generator: the loaders/formatters it wires up are stateless between
+# requests, so one instance per process is enough
+_GENERATOR = None
+
+
+def _get_generator():
+    """Return the shared BatchTranscriptGenerator, building it on first use."""
+    global _GENERATOR
+    if _GENERATOR is None:
+        _GENERATOR = BatchTranscriptGenerator()
+    return _GENERATOR
+
 
 
+# Chunk size for reading POST bodies: large enough that a multi-MB Excel
+# upload takes a handful of reads, small enough to keep buffers modest.
+_BODY_READ_CHUNK = 1 << 16
+
+# Every response carries the same CORS headers; emitting them as one
+# precomputed block from end_headers() replaces three send_header string
+# formats per response (and keeps the handlers from drifting apart).
+_CORS_HEADER_BLOCK = (
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Access-Control-Allow-Methods: POST, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type, Authorization, '
+    b'X-Requested-With, Accept, Origin\r\n'
+)
+
 class handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 enables keep-alive, so warm clients reuse the TCP connection
+    # instead of paying a handshake per request. It requires the exact
+    # Content-Length emitted by the response helpers below.
+    protocol_version = 'HTTP/1.1'
+
+    def end_headers(self):
+        # Append the shared CORS block in a single buffer write before the
+        # terminating blank line goes out
+        self._headers_buffer.append(_CORS_HEADER_BLOCK)
+        super().end_headers()
+
+    def _read_body(self):
+        """Read the exact Content-Length body into one preallocated buffer.
+
+        readinto() in fixed chunks fills a single bytearray, so a multi-MB
+        upload costs a handful of socket reads and no intermediate copies.
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        buf = bytearray(length)
+        view = memoryview(buf)
+        offset = 0
+        while offset < length:
+            read = self.rfile.readinto(view[offset:offset + _BODY_READ_CHUNK])
+            if not read:
+                break
+            offset += read
+        return bytes(buf) if offset == length else bytes(buf[:offset])
+
     def do_OPTIONS(self):
         """Handle CORS preflight requests."""
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept, Origin')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
     def do_POST(self):
@@ -245,15 +344,12 @@ class handler(BaseHTTPRequestHandler):
 
             print(f"DEBUG: Boundary extracted: {boundary}")
 
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            print(f"DEBUG: Content-Length: {content_length}")
-            if content_length == 0:
+            # Read the body in large chunks into one buffer
+            body = self._read_body()
+            print(f"DEBUG: Read {len(body)} bytes from request body")
+            if not body:
                 self.send_error_response(400, 'No data received')
                 return
-
-            body = self.rfile.read(content_length)
-            print(f"DEBUG: Read {len(body)} bytes from request body")
             
             # Parse form data
             form_data = self.parse_multipart_form_data(body, boundary.encode())
@@ -273,10 +369,10 @@ class handler(BaseHTTPRequestHandler):
 
             # Parse author info YAML
             try:
-                author_yaml_content = form_data[b'author_info'].decode('utf-8')
-                print(f"DEBUG: Author YAML content length: {len(author_yaml_content)}")
-                print(f"DEBUG: Author YAML preview: {author_yaml_content[:100]}...")
-                author_data = yaml.safe_load(author_yaml_content)
+                author_yaml_bytes = form_data[b'author_info']
+                print(f"DEBUG: Author YAML content length: {len(author_yaml_bytes)}")
+                print(f"DEBUG: Author YAML preview: {author_yaml_bytes[:100]}...")
+                author_data = yaml.load(author_yaml_bytes, Loader=_YamlSafeLoader)
                 if 'author' not in author_data:
                     raise ValueError("YAML must contain 'author' key")
                 author_info = author_data['author']
@@ -287,8 +383,8 @@ class handler(BaseHTTPRequestHandler):
                 return
 
             print("DEBUG: Starting batch generation")
-            # Generate batch transcripts
-            generator = BatchTranscriptGenerator()
+            # Generate batch transcripts with the shared generator
+            generator = _get_generator()
             
             # Check if rank flag is present
             display_rank = False
@@ -301,8 +397,7 @@ class handler(BaseHTTPRequestHandler):
             year_info_data = None
             if b'year_info' in form_data:
                 try:
-                    year_info_content = form_data[b'year_info'].decode('utf-8', errors='replace')
-                    year_info_data = yaml.safe_load(year_info_content)
+                    year_info_data = yaml.load(form_data[b'year_info'], Loader=_YamlSafeLoader)
                     print("DEBUG: Year info parsed successfully")
                 except Exception as e:
                     print(f"DEBUG: Error parsing year info: {str(e)}")
@@ -314,7 +409,7 @@ class handler(BaseHTTPRequestHandler):
             )
             
             # Encode ZIP content as base64
-            zip_base64 = base64.b64encode(zip_content).decode('utf-8')
+            zip_base64 = base64.b64encode(zip_content).decode('ascii')
             print(f"DEBUG: Generated ZIP with {generated_count} transcripts")
             
             # Return success response
@@ -370,20 +465,18 @@ class handler(BaseHTTPRequestHandler):
     
     def send_success_response(self, data):
         """Send a successful JSON response with CORS headers."""
+        body = json.dumps(data).encode()
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept, Origin')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
     
     def send_error_response(self, status_code, message):
         """Send an error JSON response with CORS headers."""
+        body = json.dumps({'error': message}).encode()
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept, Origin')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps({'error': message}).encode())
\ No newline at end of file
+        self.wfile.write(body)
\ No newline at end of file
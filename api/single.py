@@ -4,7 +4,6 @@ import yaml
 import base64
 import os
 import sys
-import tempfile
 from datetime import datetime
 from io import BytesIO
 
@@ -14,24 +13,39 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
+# pdf_generator (and with it ReportLab) is imported lazily in the generator:
+# server.py imports this module at startup, and health/docs routes should not
+# pay the rendering import cost.
 try:
     from data_loader import DataLoader
     from text_formatter import TextFormatter
-    from pdf_generator import TranscriptPDFGenerator
     from grades_processor import GradeValidator, RankingCalculator
 except ImportError as e:
     # Fallback for Vercel deployment
     sys.path.append('/var/task')
     from data_loader import DataLoader
     from text_formatter import TextFormatter
-    from pdf_generator import TranscriptPDFGenerator
     from grades_processor import GradeValidator, RankingCalculator
 
+# Same fast-parser fallbacks as data_loader: the libyaml-backed safe loader
+# and orjson run on every POST body, falling back to the pure-Python
+# equivalents when the fast variants are unavailable.
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 
 class TranscriptGenerator:
     """Main class for transcript generation operations."""
-    
+
     def __init__(self):
+        from pdf_generator import TranscriptPDFGenerator
+
         self.data_loader = DataLoader()
         self.text_formatter = TextFormatter()
         self.pdf_generator = TranscriptPDFGenerator()
@@ -89,42 +103,90 @@ class TranscriptGenerator:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{student_data['student']['firstname']}_{student_data['student']['name']}_transcript_{timestamp}.pdf"
         
-        # Create temporary directory for PDF generation
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Generate output path
-            output_path = os.path.join(temp_dir, filename)
-            print(f"Generating PDF: {output_path}")
-            
-            # Generate PDF using the PDF generator with optional rankings
-            created_pdf = self.pdf_generator.generate_transcript(
-                formatted_texts, student_data, grades_data, output_path, student_rankings
-            )
-            
-            # Read the generated PDF
-            with open(created_pdf, 'rb') as pdf_file:
-                pdf_content = pdf_file.read()
-                
-            print(f"\n✅ PDF GENERATED SUCCESSFULLY")
-            print(f"📄 File: {filename}")
-                
-            return pdf_content, filename, student_data['student']
+        # Generate the PDF straight into memory — the response only needs the
+        # bytes, so there is no reason to round-trip through a temp directory
+        print(f"Generating PDF: {filename}")
+        pdf_buffer = BytesIO()
+        self.pdf_generator.generate_transcript(
+            formatted_texts, student_data, grades_data, pdf_buffer, student_rankings
+        )
+        pdf_content = pdf_buffer.getvalue()
+
+        print(f"\n✅ PDF GENERATED SUCCESSFULLY")
+        print(f"📄 File: {filename}")
+
+        return pdf_content, filename, student_data['student']
+
 
+# Shared generator: construction wires up loaders, formatters and the PDF
+# generator (triggering the ReportLab import), so do it once per process
+# instead of once per request
+_GENERATOR = None
+
+
+def _get_generator():
+    """Return the shared TranscriptGenerator, building it on first use."""
+    global _GENERATOR
+    if _GENERATOR is None:
+        _GENERATOR = TranscriptGenerator()
+    return _GENERATOR
+
+
+
+# Chunk size for reading POST bodies: large enough that a multi-MB Excel
+# upload takes a handful of reads, small enough to keep buffers modest.
+_BODY_READ_CHUNK = 1 << 16
+
+# Every response carries the same CORS headers; emitting them as one
+# precomputed block from end_headers() replaces three send_header string
+# formats per response (and keeps the handlers from drifting apart).
+_CORS_HEADER_BLOCK = (
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Access-Control-Allow-Methods: POST, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type, Authorization, '
+    b'X-Requested-With, Accept, Origin\r\n'
+)
 
 class handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 enables keep-alive, so warm clients reuse the TCP connection
+    # instead of paying a handshake per request. It requires the exact
+    # Content-Length emitted by the response helpers below.
+    protocol_version = 'HTTP/1.1'
+
+    def end_headers(self):
+        # Append the shared CORS block in a single buffer write before the
+        # terminating blank line goes out
+        self._headers_buffer.append(_CORS_HEADER_BLOCK)
+        super().end_headers()
+
+    def _read_body(self):
+        """Read the exact Content-Length body into one preallocated buffer.
+
+        readinto() in fixed chunks fills a single bytearray, so a multi-MB
+        upload costs a handful of socket reads and no intermediate copies.
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        buf = bytearray(length)
+        view = memoryview(buf)
+        offset = 0
+        while offset < length:
+            read = self.rfile.readinto(view[offset:offset + _BODY_READ_CHUNK])
+            if not read:
+                break
+            offset += read
+        return bytes(buf) if offset == length else bytes(buf[:offset])
+
     def do_OPTIONS(self):
         # Handle CORS preflight
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept, Origin')
+        self.send_header('Content-Length', '0')
         self.end_headers()
         
     def do_POST(self):
         try:
             print("DEBUG: Received POST request")
-            # Read content length
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
+            # Read the body in large chunks into one buffer
+            post_data = self._read_body()
             
             # Get content type
             content_type = self.headers.get('Content-Type', '')
@@ -168,24 +230,20 @@ class handler(BaseHTTPRequestHandler):
                     self.send_error_response(400, 'Missing grades file')
                     return
                 
-                # Parse the files
-                student_info_content = form_data[b'student_info'].decode('utf-8', errors='replace')
-                author_info_content = form_data[b'author_info'].decode('utf-8', errors='replace')
-                grades_content = form_data[b'grades'].decode('utf-8', errors='replace')
-                
-                print(f"DEBUG: Student info length: {len(student_info_content)}")
-                print(f"DEBUG: Author info length: {len(author_info_content)}")
-                print(f"DEBUG: Grades data length: {len(grades_content)}")
-                
-                student_info_data = yaml.safe_load(student_info_content)
-                author_info_data = yaml.safe_load(author_info_content)
-                grades_data = json.loads(grades_content)
+                # Parse the files straight from the uploaded bytes — both
+                # parsers accept bytes, so skip the intermediate decode
+                print(f"DEBUG: Student info length: {len(form_data[b'student_info'])}")
+                print(f"DEBUG: Author info length: {len(form_data[b'author_info'])}")
+                print(f"DEBUG: Grades data length: {len(form_data[b'grades'])}")
+
+                student_info_data = yaml.load(form_data[b'student_info'], Loader=_YamlSafeLoader)
+                author_info_data = yaml.load(form_data[b'author_info'], Loader=_YamlSafeLoader)
+                grades_data = _json_loads(form_data[b'grades'])
                 
                 # Optional year info
                 year_info_data = None
                 if b'year_info' in form_data:
-                    year_info_content = form_data[b'year_info'].decode('utf-8', errors='replace')
-                    year_info_data = yaml.safe_load(year_info_content)
+                    year_info_data = yaml.load(form_data[b'year_info'], Loader=_YamlSafeLoader)
                     print("DEBUG: Year info parsed successfully")
                 
                 # Check for display rank flag
@@ -203,15 +261,14 @@ class handler(BaseHTTPRequestHandler):
                 return
             
             print("DEBUG: Starting transcript generation")
-            # Generate transcript using the updated system
-            generator = TranscriptGenerator()
+            # Generate transcript using the shared generator
+            generator = _get_generator()
             
             # Process with optional ranking if requested
             student_rankings = None
             if display_rank and b'rankings' in form_data:
                 try:
-                    rankings_content = form_data[b'rankings'].decode('utf-8', errors='replace')
-                    student_rankings = json.loads(rankings_content)
+                    student_rankings = _json_loads(form_data[b'rankings'])
                     print(f"DEBUG: Using provided rankings data")
                 except Exception as e:
                     print(f"DEBUG: Error parsing rankings data: {str(e)}")
@@ -221,7 +278,7 @@ class handler(BaseHTTPRequestHandler):
             )
             
             # Encode PDF as base64
-            pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
+            pdf_base64 = base64.b64encode(pdf_content).decode('ascii')
             
             print(f"DEBUG: Generated PDF for {student_info['firstname']} {student_info['name']}")
             
@@ -276,20 +333,18 @@ class handler(BaseHTTPRequestHandler):
     
     def send_success_response(self, data):
         """Send a successful JSON response with CORS headers."""
+        body = json.dumps(data).encode()
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept, Origin')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
     
     def send_error_response(self, status_code, message):
         """Send an error JSON response with CORS headers."""
+        body = json.dumps({'error': message}).encode()
         self.send_response(status_code)
         self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept, Origin')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps({'error': message}).encode())
\ No newline at end of file
+        self.wfile.write(body)
\ No newline at end of file
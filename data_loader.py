@@ -10,12 +10,60 @@ Author: ENS Transcript Generator
 Date: September 2025
 """
 
+import functools
 import json
 import yaml
 import pandas as pd
 from typing import Dict, List, Any, Optional
 import os
 
+# Prefer the libyaml-backed loader: same semantics as safe_load but the C
+# parser is an order of magnitude faster. Falls back to the pure-Python
+# loader when PyYAML was built without libyaml.
+try:
+    from yaml import CSafeLoader as _YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlSafeLoader
+
+# Prime the loader once at import: the first yaml.load pays the loader's
+# dispatch-table setup, so take that hit at startup rather than inside the
+# first request's parse.
+yaml.load(b'a: 1', Loader=_YamlSafeLoader)
+
+# Prefer orjson for parsing: 2-6x faster than stdlib json and it takes raw
+# bytes, skipping the UTF-8 decode pass. Falls back to stdlib json.loads
+# (which also accepts bytes) when orjson is not installed.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_author_yaml(raw: bytes) -> Dict[str, Any]:
+    """
+    Parse author YAML bytes, memoized on content.
+
+    The same operator uploads the same author file on nearly every request,
+    so repeat uploads become a cache hit instead of a YAML parse. The blob
+    is a couple hundred bytes, so keying the cache on the bytes themselves
+    is cheaper than hashing them into a separate digest first.
+    """
+    return yaml.load(raw, Loader=_YamlSafeLoader)
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_json(file_path: str, mtime: float) -> Dict[str, Any]:
+    """
+    Parse a JSON file, memoized on (path, mtime).
+
+    The mtime key makes the cache self-invalidating: editing the file changes
+    its mtime and forces a reparse, while repeat loads of an unchanged file
+    (one per student in a server batch) become a dict lookup.
+    """
+    with open(file_path, 'rb') as file:
+        return _json_loads(file.read())
+
 
 class DataLoader:
     """Handles loading data from various file formats for transcript generation."""
@@ -39,7 +87,7 @@ class DataLoader:
             raise FileNotFoundError(f"YAML file not found: {file_path}")
             
         with open(file_path, 'r', encoding='utf-8') as file:
-            return yaml.safe_load(file)
+            return yaml.load(file, Loader=_YamlSafeLoader)
     
     @staticmethod
     def load_json_file(file_path: str) -> Dict[str, Any]:
@@ -58,10 +106,45 @@ class DataLoader:
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"JSON file not found: {file_path}")
-            
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+
+        with open(file_path, 'rb') as file:
+            return _json_loads(file.read())
     
+    @staticmethod
+    def load_yaml_stream(fp: Any) -> Dict[str, Any]:
+        """
+        Parse YAML from an open file-like object.
+
+        Lets callers that already hold the bytes in memory (e.g. uploaded
+        files in the API handlers) skip the write-to-temp-file round-trip.
+
+        Args:
+            fp: Readable file-like object positioned at the YAML content
+
+        Returns:
+            Dictionary containing the YAML data
+
+        Raises:
+            yaml.YAMLError: If the content is not valid YAML
+        """
+        return yaml.load(fp, Loader=_YamlSafeLoader)
+
+    @staticmethod
+    def load_json_stream(fp: Any) -> Dict[str, Any]:
+        """
+        Parse JSON from an open file-like object.
+
+        Args:
+            fp: Readable file-like object positioned at the JSON content
+
+        Returns:
+            Dictionary containing the JSON data
+
+        Raises:
+            json.JSONDecodeError: If the content is not valid JSON
+        """
+        return _json_loads(fp.read())
+
     @staticmethod
     def save_json_file(data: Dict[str, Any], file_path: str) -> None:
         """
@@ -87,7 +170,21 @@ class DataLoader:
         """
         data = cls.load_yaml_file(file_path)
         return {'student': data['student']} if 'student' in data else data
-    
+
+    @classmethod
+    def load_student_info_stream(cls, fp: Any) -> Dict[str, Any]:
+        """
+        Load student information from a file-like object.
+
+        Args:
+            fp: Readable file-like object with the student info YAML
+
+        Returns:
+            Dictionary with student data, ensuring 'student' key exists
+        """
+        data = cls.load_yaml_stream(fp)
+        return {'student': data['student']} if 'student' in data else data
+
     @classmethod
     def load_author_info(cls, file_path: str) -> Dict[str, Any]:
         """
@@ -101,7 +198,35 @@ class DataLoader:
         """
         data = cls.load_yaml_file(file_path)
         return {'author': data['author']} if 'author' in data else data
-    
+
+    @classmethod
+    def load_author_info_stream(cls, fp: Any) -> Dict[str, Any]:
+        """
+        Load author information from a file-like object.
+
+        Args:
+            fp: Readable file-like object with the author info YAML
+
+        Returns:
+            Dictionary with author data, ensuring 'author' key exists
+        """
+        data = cls.load_yaml_stream(fp)
+        return {'author': data['author']} if 'author' in data else data
+
+    @classmethod
+    def load_author_info_cached(cls, raw: bytes) -> Dict[str, Any]:
+        """
+        Load author information from raw YAML bytes, with content memoization.
+
+        Args:
+            raw: The author info YAML as bytes (e.g. an uploaded file body)
+
+        Returns:
+            Dictionary with author data, ensuring 'author' key exists
+        """
+        data = _cached_author_yaml(raw)
+        return {'author': data['author']} if 'author' in data else data
+
     @classmethod
     def load_year_info(cls, file_path: str) -> Dict[str, Any]:
         """
@@ -127,7 +252,11 @@ class DataLoader:
         Returns:
             Dictionary mapping template names to template strings
         """
-        return cls.load_json_file(file_path)
+        # Templates are static between edits, so serve them from the
+        # mtime-keyed cache instead of reparsing per load
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"JSON file not found: {file_path}")
+        return _cached_json(file_path, os.path.getmtime(file_path))
     
     @classmethod
     def load_grades_data(cls, file_path: str) -> Dict[str, List[float]]:
@@ -144,6 +273,19 @@ class DataLoader:
         """
         return cls.load_json_file(file_path)
 
+    @classmethod
+    def load_grades_stream(cls, fp: Any) -> Dict[str, List[float]]:
+        """
+        Load grades data from a file-like object.
+
+        Args:
+            fp: Readable file-like object with the grades JSON
+
+        Returns:
+            Dictionary in the same formats as load_grades_data
+        """
+        return cls.load_json_stream(fp)
+
 
 class ExcelStudentLoader:
     """Handles loading student data from Excel files for batch processing."""
@@ -313,24 +455,27 @@ class ExcelStudentLoader:
         return program_info
     
     @classmethod
-    def load_students_from_excel(cls, file_path: str) -> List[Dict[str, Any]]:
+    def load_students_from_excel(cls, file_path: Any) -> List[Dict[str, Any]]:
         """
         Load student data from an Excel file for batch processing.
-        
+
         Args:
-            file_path: Path to the Excel file containing student data
-            
+            file_path: Path to the Excel file containing student data, or a
+                file-like object holding the workbook bytes (pandas reads
+                both, so uploads can be parsed without a temp file)
+
         Returns:
             List of dictionaries, each containing student info and grades
-            
+
         Raises:
             FileNotFoundError: If the Excel file doesn't exist
             Exception: If there's an error reading the Excel file
         """
-        if not os.path.exists(file_path):
+        is_path = isinstance(file_path, (str, os.PathLike))
+        if is_path and not os.path.exists(file_path):
             raise FileNotFoundError(f"Excel file not found: {file_path}")
-        
-        print(f"Loading Excel file: {file_path}")
+
+        print(f"Loading Excel file: {file_path if is_path else '<in-memory workbook>'}")
         
         try:
             # First read without specifying header to extract program info
@@ -505,6 +650,8 @@ class ExcelStudentLoader:
             print("Attempting to debug Excel structure...")
             try:
                 # Try basic reading to see if we can at least get some information
+                if not is_path:
+                    file_path.seek(0)
                 basic_df = pd.read_excel(file_path)
                 print(f"Excel file shape: {basic_df.shape}")
                 print(f"First 5 rows summary:")
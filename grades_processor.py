@@ -11,11 +11,35 @@ Author: ENS Transcript Generator
 Date: September 2025
 """
 
+from bisect import bisect_right
 from typing import Dict, List, Tuple, Any
 import pandas as pd
 
 no_grades_placeholder = "N/A"
 
+# Grade buckets sorted ascending: bisect_right over the thresholds gives the
+# bucket index directly, replacing the branchy if/elif ladder that ran once
+# per course plus once for the summary row. Each bucket carries both the
+# display string and the float so accumulators never reparse the string.
+_GRADE_THRESHOLDS = (7, 8, 9, 10, 11, 12, 13, 14, 16)
+
+# Fixed table header cells, copied into a fresh row per table (rows must stay
+# lists — the PDF layer pops the rank column in place when it is hidden)
+_TABLE_HEADER = ('Course Title', 'Credits\nAwarded', 'Grade out\nof 20', 'Letter\nGrade', 'GPA')
+_TABLE_HEADER_WITH_RANK = _TABLE_HEADER + ('Rank',)
+_GRADE_BUCKETS = (
+    ("F", "0.0", 0.0),
+    ("C-", "1.67", 1.67),
+    ("C", "2.0", 2.0),
+    ("C+", "2.33", 2.33),
+    ("B-", "2.67", 2.67),
+    ("B", "3.0", 3.0),
+    ("B+", "3.33", 3.33),
+    ("A-", "3.67", 3.67),
+    ("A", "4.0", 4.0),
+    ("A+", "4.33", 4.33),
+)
+
 
 class GradeConverter:
     """Handles conversion between different grading systems."""
@@ -37,27 +61,24 @@ class GradeConverter:
         """
         if grade_20 is None:
             return no_grades_placeholder, no_grades_placeholder
-        
-        elif grade_20 >= 16:
-            return "A+", "4.33"
-        elif grade_20 >= 14:
-            return "A", "4.0"
-        elif grade_20 >= 13:
-            return "A-", "3.67"
-        elif grade_20 >= 12:
-            return "B+", "3.33"
-        elif grade_20 >= 11:
-            return "B", "3.0"
-        elif grade_20 >= 10:
-            return "B-", "2.67"
-        elif grade_20 >= 9:
-            return "C+", "2.33"
-        elif grade_20 >= 8:
-            return "C", "2.0"
-        elif grade_20 >= 7:
-            return "C-", "1.67"
-        else:
-            return "F", "0.0"
+
+        return _GRADE_BUCKETS[bisect_right(_GRADE_THRESHOLDS, grade_20)][:2]
+
+    @staticmethod
+    def grade_bucket(grade_20: float) -> Tuple[str, str, float]:
+        """
+        Convert grade out of 20 to its full (letter, gpa_string, gpa_float) bucket.
+
+        Used by the table generator so GPA accumulation works on the float
+        directly instead of reparsing the display string per course.
+
+        Args:
+            grade_20: Grade on a scale of 0-20
+
+        Returns:
+            Tuple of (letter_grade, gpa_string, gpa_float)
+        """
+        return _GRADE_BUCKETS[bisect_right(_GRADE_THRESHOLDS, grade_20)]
     
     @staticmethod
     def get_grading_scale_info() -> str:
@@ -158,17 +179,14 @@ class GradeTableGenerator:
         
         # Table headers
         if display_rank:
-            table_data = [
-                ['Course Title', 'Credits\nAwarded', 'Grade out\nof 20', 'Letter\nGrade', 'GPA', 'Rank']
-            ]
+            table_data = [list(_TABLE_HEADER_WITH_RANK)]
         else:
-            table_data = [
-                ['Course Title', 'Credits\nAwarded', 'Grade out\nof 20', 'Letter\nGrade', 'GPA']
-            ]
+            table_data = [list(_TABLE_HEADER)]
         
         # Track overall statistics
         passed_all = True
         total_grade_points = 0
+        total_grade_points_compensation = 0
         actual_credits_earned = 0
         total_grade_sum = 0
         total_courses = 0
@@ -206,14 +224,26 @@ class GradeTableGenerator:
             if max_credits > 0 and credits_obtained == 0:
                 credits_display = f"{credits_display} *"
             
-            # Convert to letter grade and GPA
-            letter_grade, gpa = (self.converter.grade_to_letter_and_gpa(grade) if grade is not None else (no_grades_placeholder, no_grades_placeholder))
-            grade_display = str(grade) if grade is not None else no_grades_placeholder
-            
-            # Accumulate statistics for GPA calculation
-            if grade is not None and credits_obtained > 0:
-                if gpa != no_grades_placeholder:
-                    total_grade_points += float(gpa) * credits_obtained
+            # Convert to letter grade and GPA (string for display, float for
+            # the accumulators below)
+            if grade is not None:
+                letter_grade, gpa, gpa_value = self.converter.grade_bucket(grade)
+                grade_display = str(grade)
+            else:
+                letter_grade = gpa = grade_display = no_grades_placeholder
+                gpa_value = None
+
+            # Accumulate statistics for GPA calculation. Both the earned-credit
+            # and the compensation (max-credit) weighted sums are built in this
+            # single pass instead of re-walking grades_data afterwards.
+            if gpa_value is not None:
+                total_grade_points_compensation += gpa_value * max_credits
+                # The 3-element format reports its own credits_obtained for
+                # GPA weighting purposes
+                gpa_credits = course_info[1] if len(course_info) == 3 else credits_obtained
+                if gpa_credits > 0:
+                    total_grade_points += gpa_value * gpa_credits
+                if credits_obtained > 0:
                     actual_credits_earned += credits_obtained
             
             # Track totals for average calculation
@@ -262,10 +292,15 @@ class GradeTableGenerator:
         )
         credits_for_totals += total_no_grades_credits
         
-        # Calculate cumulative GPA
-        cumulative_gpa = self._calculate_cumulative_gpa(
-            grades_data, average_grade, total_max_credits, actual_credits_earned
-        )
+        # Calculate cumulative GPA from the sums accumulated in the main pass
+        if average_grade > 10:
+            # Compensation: weigh every graded course by its max credits
+            cumulative_gpa = (total_grade_points_compensation / total_max_credits
+                              if total_max_credits > 0 else 0)
+        else:
+            # Use only actually earned credits
+            cumulative_gpa = (total_grade_points / actual_credits_earned
+                              if actual_credits_earned > 0 else 0)
         
         # Add summary row
         summary_row = self._create_summary_row(
@@ -274,51 +309,7 @@ class GradeTableGenerator:
         table_data.append(summary_row)
 
         return table_data, passed_all
-    
-    def _calculate_cumulative_gpa(self, grades_data: Dict[str, List[float]], 
-                                average_grade: float, total_max_credits: int, 
-                                actual_credits_earned: int) -> float:
-        """Calculate cumulative GPA based on compensation logic."""
-        if average_grade > 10:
-            # Use all max credits for compensation GPA calculation
-            total_grade_points_compensation = 0
-            for course_title, course_info in grades_data.items():
-                grade = course_info[0]
-                
-                # Support both formats for max_credits
-                if len(course_info) == 2:
-                    max_credits = course_info[1]
-                elif len(course_info) == 3:
-                    max_credits = course_info[2]
-                else:
-                    continue
-                    
-                if grade is not None:
-                    _, gpa = self.converter.grade_to_letter_and_gpa(grade)
-                    if gpa != no_grades_placeholder:
-                        total_grade_points_compensation += float(gpa) * max_credits
-            return total_grade_points_compensation / total_max_credits if total_max_credits > 0 else 0
-        else:
-            # Use only actually earned credits
-            total_grade_points = 0
-            for course_title, course_info in grades_data.items():
-                grade = course_info[0]
-                
-                # Support both formats for credits calculation
-                if len(course_info) == 2:
-                    max_credits = course_info[1]
-                    credits_obtained = self.calculator.calculate_individual_credits(grade, max_credits)
-                elif len(course_info) == 3:
-                    credits_obtained = course_info[1]
-                else:
-                    continue
-                    
-                if grade is not None and credits_obtained > 0:
-                    _, gpa = self.converter.grade_to_letter_and_gpa(grade)
-                    if gpa != no_grades_placeholder:
-                        total_grade_points += float(gpa) * credits_obtained
-            return total_grade_points / actual_credits_earned if actual_credits_earned > 0 else 0
-    
+
     def _create_summary_row(self, credits_for_totals: int, average_grade: float, 
                           cumulative_gpa: float, display_rank: bool = True) -> List[str]:
         """Create the summary row for the grades table."""
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for the Railway deployment (picked up automatically
+by the startCommand in railway.json).
+
+The CPU-heavy PDF rendering already runs in process pools built inside
+server.py, so the web workers mostly parse uploads and ship responses —
+I/O that threads overlap fine. gthread is used instead of the gevent
+worker class because gevent's monkey-patching does not mix well with the
+ProcessPoolExecutor doing the actual rendering, and gevent is not a
+pinned dependency. Worker count is kept low on purpose: each web worker
+lazily forks its own rendering pool, so scaling workers multiplies
+memory, not throughput.
+"""
+
+worker_class = 'gthread'
+workers = 2
+threads = 8
+
+# Keep connections open between the SPA's requests and Railway's health
+# checks instead of paying a TCP handshake each time
+keepalive = 5
+
+# Large batch jobs render a whole roster before responding; match the
+# healthcheckTimeout in railway.json rather than gunicorn's 30s default
+timeout = 300
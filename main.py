@@ -21,18 +21,126 @@ Date: September 2025
 """
 
 import argparse
+import concurrent.futures
+import logging
 import os
 import sys
 import hashlib
+import traceback
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-# Import our custom modules
+# Import our custom modules. pdf_generator is imported lazily where rendering
+# actually happens: it pulls in ReportLab, which dominates cold-start time and
+# is dead weight for --help and argument-validation paths.
 from data_loader import DataLoader, ExcelStudentLoader
 from text_formatter import TextFormatter
-from pdf_generator import TranscriptPDFGenerator
 from grades_processor import GradeValidator, RankingCalculator
 
+logger = logging.getLogger(__name__)
+
+
+# Shared read-only state for batch worker processes. Author data, templates,
+# year info and rankings are identical for every student, so they are shipped
+# to each worker once via the pool initializer instead of being pickled into
+# every per-student task.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_batch_worker(author_data: Dict[str, Any], text_templates: Dict[str, str],
+                       year_info: Dict[str, Any], all_rankings: Dict[str, Any],
+                       output_dir: str, total_students: int,
+                       run_timestamp: str) -> None:
+    """Initialize a batch worker process with the shared batch state."""
+    # Each worker pays the ReportLab import and cache warm-up cost exactly
+    # once, here, instead of on its first transcript
+    import pdf_generator
+    from pdf_generator import TranscriptPDFGenerator
+
+    pdf_generator.warm_up()
+
+    _WORKER_STATE['author_data'] = author_data
+    _WORKER_STATE['text_templates'] = text_templates
+    _WORKER_STATE['year_info'] = year_info
+    _WORKER_STATE['all_rankings'] = all_rankings
+    _WORKER_STATE['output_dir'] = output_dir
+    # Normalized once so per-student path building is plain concatenation
+    # instead of an os.path.join call per file
+    _WORKER_STATE['output_prefix'] = output_dir.rstrip(os.sep) + os.sep
+    _WORKER_STATE['total_students'] = total_students
+    _WORKER_STATE['run_timestamp'] = run_timestamp
+    _WORKER_STATE['text_formatter'] = TextFormatter()
+    _WORKER_STATE['pdf_generator'] = TranscriptPDFGenerator()
+    # Partially evaluate the generator: the header subtitle only depends on
+    # the (batch-invariant) year name, so format it once per worker
+    _WORKER_STATE['render'] = _WORKER_STATE['pdf_generator'].prepare(
+        year_info['year']['yearname'])
+
+
+def _render_batch_student(task: Tuple[int, Dict[str, Any]]) -> Optional[str]:
+    """
+    Render one (pre-validated) student's transcript inside a batch worker.
+
+    Args:
+        task: Tuple of (student index, student Excel data)
+
+    Returns:
+        Path to the generated PDF file, or None if generation failed
+    """
+    i, student_excel_data = task
+    state = _WORKER_STATE
+    output_prefix = state['output_prefix']
+
+    try:
+        print(f"\n--- Processing student {i+1}/{state['total_students']} ---")
+
+        # Combine student data with author data and year info
+        student_data = state['text_formatter'].combine_student_author_data(
+            {'student': student_excel_data['student']}, state['author_data'], state['year_info']
+        )
+
+        # Bind the hot fields once instead of re-doing the nested dict
+        # lookups for every print/filename below
+        firstname = student_data['student']['firstname']
+        lastname = student_data['student']['name']
+
+        # Get student ID for ranking lookup
+        student_id = f"{firstname} {lastname}"
+
+        # Get student-specific rankings
+        all_rankings = state['all_rankings']
+        student_rankings = {}
+        for course in student_excel_data['grades']:
+            if course in all_rankings and student_id in all_rankings[course]:
+                student_rankings[course] = all_rankings[course][student_id]
+
+        print(f"👤 Student: {firstname} {lastname}")
+        print(f"📚 Courses: {len(student_excel_data['grades'])}")
+        print(f"🏅 Rankings: {len(student_rankings)} courses have rankings")
+
+        # Format text templates
+        formatted_texts = state['text_formatter'].format_all_templates(
+            student_data, state['text_templates'])
+
+        # Generate PDF filename (the timestamp is shared by the whole run)
+        pdf_filename = f"{firstname}_{lastname}_transcript_{state['run_timestamp']}_{i+1:03d}.pdf"
+        pdf_path = output_prefix + pdf_filename
+
+        # Generate PDF with rankings (grades are passed as the already-parsed
+        # dict; no per-student temp file round-trip through disk)
+        created_pdf = state['render'](
+            formatted_texts, student_data, student_excel_data['grades'], pdf_path, student_rankings
+        )
+
+        print(f"✅ Generated: {os.path.basename(created_pdf)}")
+        return created_pdf
+
+    except Exception:
+        # logger.exception formats lazily and can be level-gated, unlike an
+        # unconditional traceback.print_exc on every bad row
+        logger.exception("❌ Error generating PDF for student %d", i + 1)
+        return None
+
 
 class TranscriptGenerator:
     """Main class for transcript generation operations."""
@@ -41,7 +149,6 @@ class TranscriptGenerator:
         self.data_loader = DataLoader()
         self.excel_loader = ExcelStudentLoader()
         self.text_formatter = TextFormatter()
-        self.pdf_generator = TranscriptPDFGenerator()
         self.grade_validator = GradeValidator()
         self.ranking_calculator = RankingCalculator()
     
@@ -103,15 +210,18 @@ class TranscriptGenerator:
         
         # Generate output filename if not provided
         if not output_path:
+            student = student_data['student']
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{student_data['student']['firstname']}_{student_data['student']['name']}_transcript_{timestamp}.pdf"
+            filename = f"{student['firstname']}_{student['name']}_transcript_{timestamp}.pdf"
             output_path = filename
         elif not output_path.lower().endswith('.pdf'):
             output_path += '.pdf'
         
-        # Generate PDF
+        # Generate PDF (ReportLab is only imported once rendering is certain)
+        from pdf_generator import TranscriptPDFGenerator
+
         print(f"Generating PDF: {output_path}")
-        created_pdf = self.pdf_generator.generate_transcript(
+        created_pdf = TranscriptPDFGenerator().generate_transcript(
             formatted_texts, student_data, grades_data, output_path
         )
         
@@ -121,17 +231,19 @@ class TranscriptGenerator:
         
         return created_pdf
     
-    def generate_batch_transcripts(self, excel_path: str, author_yaml_path: str, 
-                                 output_dir: str = 'output', display_rank: bool = False) -> List[str]:
+    def generate_batch_transcripts(self, excel_path: str, author_yaml_path: str,
+                                 output_dir: str = 'output', display_rank: bool = False,
+                                 workers: Optional[int] = None) -> List[str]:
         """
         Generate multiple transcripts from an Excel file.
-        
+
         Args:
             excel_path: Path to Excel file containing student data
             author_yaml_path: Path to author YAML file
             output_dir: Output directory for generated PDFs
             display_rank: Whether to display the rank column in the PDF
-            
+            workers: Number of worker processes (defaults to the CPU count)
+
         Returns:
             List of paths to generated PDF files
             
@@ -163,94 +275,63 @@ class TranscriptGenerator:
         else:
             print("📊 Ranking display disabled, skipping rank calculation")
         
-        # Create output directory if it doesn't exist
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            print(f"📁 Created output directory: {output_dir}")
-        
-        generated_pdfs = []
-        successful_count = 0
-        
+        # Create output directory if it doesn't exist (exist_ok avoids the
+        # exists/makedirs race and halves the syscalls)
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Build the year info once — it only depends on what was detected
+        # during Excel loading, not on the individual student
+        year_info = {'year': {}}
+
+        # Use the program name detected during Excel loading if available
+        if hasattr(self.excel_loader, 'program_name') and self.excel_loader.program_name:
+            year_info['year']['yearname'] = self.excel_loader.program_name
+        else:
+            # Default fallback
+            year_info['year']['yearname'] = 'First year of Master\'s degree in Computer Science'
+
+        # Use the school year detected during Excel loading if available
+        if hasattr(self.excel_loader, 'school_year') and self.excel_loader.school_year:
+            year_info['year']['schoolyear'] = self.excel_loader.school_year
+        else:
+            # Default fallback
+            year_info['year']['schoolyear'] = '2023-2024'
+
+        # Pre-validate all students so known-bad rows never reach the workers
+        tasks = []
         for i, student_excel_data in enumerate(students):
-            try:
-                print(f"\n--- Processing student {i+1}/{len(students)} ---")
-                
-                # Skip students with no grades
-                if not student_excel_data['grades']:
-                    print(f"⚠️  Skipping student {i+1}: No grades found")
-                    continue
-                
-                # Combine student data with author data and year info
-                # Extract program and school year info from Excel data if available
-                year_info = {'year': {}}
-                
-                # Use the program name detected during Excel loading if available
-                if hasattr(self.excel_loader, 'program_name') and self.excel_loader.program_name:
-                    year_info['year']['yearname'] = self.excel_loader.program_name
-                else:
-                    # Default fallback
-                    year_info['year']['yearname'] = 'First year of Master\'s degree in Computer Science'
-                
-                # Use the school year detected during Excel loading if available
-                if hasattr(self.excel_loader, 'school_year') and self.excel_loader.school_year:
-                    year_info['year']['schoolyear'] = self.excel_loader.school_year
-                else:
-                    # Default fallback
-                    year_info['year']['schoolyear'] = '2023-2024'
-                
-                student_data = self.text_formatter.combine_student_author_data(
-                    {'student': student_excel_data['student']}, author_data, year_info
-                )
-                
-                # Get student ID for ranking lookup
-                student_id = f"{student_data['student']['firstname']} {student_data['student']['name']}"
-                
-                # Get student-specific rankings
-                student_rankings = {}
-                for course in student_excel_data['grades']:
-                    if course in all_rankings and student_id in all_rankings[course]:
-                        student_rankings[course] = all_rankings[course][student_id]
-                
-                print(f"👤 Student: {student_data['student']['firstname']} {student_data['student']['name']}")
-                print(f"📚 Courses: {len(student_excel_data['grades'])}")
-                print(f"🏅 Rankings: {len(student_rankings)} courses have rankings")
-                
-                # Validate grades data
-                is_valid, errors = self.grade_validator.validate_grades_data(student_excel_data['grades'])
-                if not is_valid:
-                    print(f"❌ Invalid grades data for student {i+1}: {'; '.join(errors)}")
-                    continue
-                
-                # Format text templates
-                formatted_texts = self.text_formatter.format_all_templates(student_data, text_templates)
-                
-                # Generate PDF filename
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                pdf_filename = f"{student_data['student']['firstname']}_{student_data['student']['name']}_transcript_{timestamp}_{i+1:03d}.pdf"
-                pdf_path = os.path.join(output_dir, pdf_filename)
-                
-                # Create temporary grades file for this student
-                temp_grades_file = os.path.join(output_dir, f"temp_grades_{i+1:03d}.json")
-                self.data_loader.save_json_file(student_excel_data['grades'], temp_grades_file)
-                
-                # Generate PDF with rankings
-                created_pdf = self.pdf_generator.generate_transcript(
-                    formatted_texts, student_data, student_excel_data['grades'], pdf_path, student_rankings
-                )
-                
-                # Clean up temporary grades file
-                os.remove(temp_grades_file)
-                
-                generated_pdfs.append(created_pdf)
-                successful_count += 1
-                print(f"✅ Generated: {os.path.basename(created_pdf)}")
-                
-            except Exception as e:
-                print(f"❌ Error generating PDF for student {i+1}: {e}")
-                import traceback
-                traceback.print_exc()
+            # Skip students with no grades
+            if not student_excel_data['grades']:
+                print(f"⚠️  Skipping student {i+1}: No grades found")
                 continue
-        
+
+            # Validate grades data before doing any combination/formatting work
+            is_valid, errors = self.grade_validator.validate_grades_data(student_excel_data['grades'])
+            if not is_valid:
+                print(f"❌ Invalid grades data for student {i+1}: {'; '.join(errors)}")
+                continue
+
+            tasks.append((i, student_excel_data))
+
+        generated_pdfs = []
+        successful_count = 0
+
+        # One timestamp for the whole run instead of a datetime.now per PDF
+        run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Render transcripts in worker processes. The initializer hands each
+        # worker one shared copy of the author data, templates, year info and
+        # rankings, so per-task pickling is limited to the student row itself.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_batch_worker,
+                initargs=(author_data, text_templates, year_info, all_rankings,
+                          output_dir, len(students), run_timestamp)) as executor:
+            for created_pdf in executor.map(_render_batch_student, tasks, chunksize=4):
+                if created_pdf:
+                    generated_pdfs.append(created_pdf)
+                    successful_count += 1
+
         print(f"\n🎉 BATCH GENERATION COMPLETE")
         print(f"✅ Successfully generated: {successful_count}/{len(students)} PDFs")
         print(f"📁 Output directory: {os.path.abspath(output_dir)}")
@@ -303,6 +384,8 @@ Examples:
                            help='Path to author YAML file (batch mode)')
         parser.add_argument('-r', '--rank', action='store_true',
                            help='Display rank column in batch mode (if omitted, ranking will not be shown)')
+        parser.add_argument('-w', '--workers', type=int,
+                           help='Number of worker processes for batch mode (default: CPU count)')
         
         # Common arguments
         parser.add_argument('-o', '--output',
@@ -345,7 +428,10 @@ Examples:
 
 def fix_macos_hashlib():
     """Fix for macOS hashlib issue."""
-    if sys.platform == "darwin":
+    # Python >= 3.9 accepts the usedforsecurity kwarg natively, so the wrapper
+    # (one extra Python frame + kwargs.pop per md5 call) is pure overhead there.
+    # ReportLab hashes fonts/images with md5, so this runs on every PDF.
+    if sys.platform == "darwin" and sys.version_info < (3, 9):
         if not hasattr(hashlib.md5, "__patched__"):
             _orig_md5 = hashlib.md5
             def _patched_md5(*args, **kwargs):
@@ -355,11 +441,13 @@ def fix_macos_hashlib():
             hashlib.md5 = _patched_md5
 
 
+# Apply once at import, before any ReportLab import can trigger md5 calls.
+# On anything but old-macOS Python this is a single false branch.
+fix_macos_hashlib()
+
+
 def main():
     """Main entry point for the transcript generator."""
-    # Fix macOS issue
-    fix_macos_hashlib()
-    
     # Parse command-line arguments
     cli = CommandLineInterface()
     args = cli.parse_args()
@@ -384,7 +472,8 @@ def main():
                 excel_path=args.students_excel,
                 author_yaml_path=args.author_yaml,
                 output_dir=output_dir,
-                display_rank=args.rank  # Pass the rank display preference
+                display_rank=args.rank,  # Pass the rank display preference
+                workers=args.workers
             )
     except FileNotFoundError as e:
         print(f"❌ Error: File not found - {e}")
@@ -394,7 +483,6 @@ def main():
         sys.exit(1)
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
@@ -12,6 +12,7 @@ Author: ENS Transcript Generator
 Date: September 2025
 """
 
+import io
 import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
@@ -27,6 +28,63 @@ from grades_processor import GradeTableGenerator, GradeConverter
 
 no_grades_placeholder = "N/A"
 
+# Resolved once at import: the logo asset never moves at runtime, so checking
+# per render would cost one stat syscall per PDF in a batch
+_DEFAULT_LOGO_PATH = 'assets/logo.png'
+_DEFAULT_LOGO_EXISTS = os.path.exists(_DEFAULT_LOGO_PATH)
+
+# Table styles are static command lists; building them once at import avoids
+# re-parsing the style tuples for every transcript in a batch
+_TITLE_SUBTITLE_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+])
+
+_HEADER_TABLE_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),     # Logo left aligned
+    ('ALIGN', (1, 0), (1, 0), 'CENTER'),   # Title/subtitle centered
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ('TOPPADDING', (0, 0), (-1, -1), 0),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+])
+
+_GRADES_TABLE_STYLE = TableStyle([
+    # Header row styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+
+    # Data rows styling (excluding summary row)
+    ('BACKGROUND', (0, 1), (-1, -2), colors.white),
+    ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -2), 10),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+    # Summary row styling (last row)
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 10),
+
+    # Grid styling
+    ('BOX', (0, 0), (-1, -1), 0.8, colors.black),  # Thick outer border
+    ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.black),  # Thin inner lines
+    ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),  # Double line above summary
+
+    # Text alignment
+    ('ALIGN', (0, 1), (0, -2), 'LEFT'),  # Left align course titles
+    ('ALIGN', (0, -1), (0, -1), 'LEFT'),  # Left align summary row label
+])
+
+
 class PDFStyleManager:
     """Manages PDF styles and formatting."""
     
@@ -83,6 +141,31 @@ class PDFStyleManager:
         return style_map.get(style_name, self.body_style)
 
 
+# Shared style manager: getSampleStyleSheet builds ~15 styles, so it is done
+# once per process instead of once per generator
+_STYLE_MANAGER: Optional[PDFStyleManager] = None
+
+
+def _get_style_manager() -> PDFStyleManager:
+    """Return the shared PDFStyleManager, building it on first use."""
+    global _STYLE_MANAGER
+    if _STYLE_MANAGER is None:
+        _STYLE_MANAGER = PDFStyleManager()
+    return _STYLE_MANAGER
+
+
+def warm_up() -> None:
+    """
+    Build a throwaway one-paragraph document to prime ReportLab's caches.
+
+    The first build in a process initializes font metric tables and color
+    registries (a one-shot 50-200ms cost). Batch pool initializers call this
+    so the first real transcript of each worker doesn't pay it.
+    """
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4)
+    doc.build([Paragraph("warm-up", _get_style_manager().get_style('body'))])
+
+
 class PDFHeaderGenerator:
     """Generates PDF headers with logo and title information."""
     
@@ -90,78 +173,70 @@ class PDFHeaderGenerator:
         self.style_manager = style_manager
         self.text_formatter = TextFormatter()
     
-    def create_header(self, student_data: Dict[str, Any], logo_path: str = 'assets/logo.png') -> Any:
+    def create_header(self, student_data: Dict[str, Any], logo_path: str = _DEFAULT_LOGO_PATH,
+                      subtitle_text: Optional[str] = None) -> Any:
         """
         Create the PDF header with logo and title/subtitle.
-        
+
         Args:
             student_data: Dictionary containing student information
             logo_path: Path to the logo image file
-            
+            subtitle_text: Pre-formatted subtitle (derived from the year name
+                           when not provided)
+
         Returns:
             ReportLab table object for the header, or title/subtitle paragraphs if no logo
         """
-        try:
-            if os.path.exists(logo_path):
-                return self._create_header_with_logo(student_data, logo_path)
-            else:
-                print(f"Warning: Logo not found at {logo_path}, creating header without logo")
-                return self._create_header_without_logo(student_data)
-        except Exception as e:
-            print(f"Warning: Could not create header with logo: {e}")
-            return self._create_header_without_logo(student_data)
-    
-    def _create_header_with_logo(self, student_data: Dict[str, Any], logo_path: str) -> Table:
+        # Existence of the default logo is cached at import; only custom paths
+        # need a fresh stat. Image-building errors are left to surface.
+        logo_available = (_DEFAULT_LOGO_EXISTS if logo_path == _DEFAULT_LOGO_PATH
+                          else os.path.exists(logo_path))
+        if logo_available:
+            return self._create_header_with_logo(student_data, logo_path, subtitle_text)
+
+        print(f"Warning: Logo not found at {logo_path}, creating header without logo")
+        return self._create_header_without_logo(student_data, subtitle_text)
+
+    def _create_header_with_logo(self, student_data: Dict[str, Any], logo_path: str,
+                                 subtitle_text: Optional[str] = None) -> Table:
         """Create header with logo on left and title/subtitle on right."""
         # Create logo image
         logo = Image(logo_path, width=2.2*inch, height=0.75*inch)
-        
+
         # Create title and subtitle
         title_text = "Transcript of academic record"
         title_para = Paragraph(title_text, self.style_manager.get_style('title'))
-        
-        subtitle_text = self.text_formatter.format_ordinal_numbers(
-            student_data['student']['yearname']
-        )
+
+        if subtitle_text is None:
+            subtitle_text = self.text_formatter.format_ordinal_numbers(
+                student_data['student']['yearname']
+            )
         subtitle_para = Paragraph(subtitle_text, self.style_manager.get_style('subtitle'))
         
         # Create nested table for title and subtitle
         title_subtitle_data = [[title_para], [subtitle_para]]
         title_subtitle_table = Table(title_subtitle_data, colWidths=[4*inch])
-        title_subtitle_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        
+        title_subtitle_table.setStyle(_TITLE_SUBTITLE_TABLE_STYLE)
+
         # Create main header table
         header_data = [[logo, title_subtitle_table]]
         header_table = Table(header_data, colWidths=[2.5*inch, 4*inch])
-        header_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ALIGN', (0, 0), (0, 0), 'LEFT'),     # Logo left aligned
-            ('ALIGN', (1, 0), (1, 0), 'CENTER'),   # Title/subtitle centered
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        
+        header_table.setStyle(_HEADER_TABLE_STYLE)
+
         return header_table
     
-    def _create_header_without_logo(self, student_data: Dict[str, Any]) -> List[Any]:
+    def _create_header_without_logo(self, student_data: Dict[str, Any],
+                                    subtitle_text: Optional[str] = None) -> List[Any]:
         """Create header without logo (fallback)."""
         title_text = "Transcript of academic record"
         title_para = Paragraph(title_text, self.style_manager.get_style('title'))
-        
-        subtitle_text = self.text_formatter.format_ordinal_numbers(
-            student_data['student']['yearname']
-        )
+
+        if subtitle_text is None:
+            subtitle_text = self.text_formatter.format_ordinal_numbers(
+                student_data['student']['yearname']
+            )
         subtitle_para = Paragraph(subtitle_text, self.style_manager.get_style('subtitle'))
-        
+
         return [title_para, subtitle_para]
 
 
@@ -257,63 +332,36 @@ class PDFTableGenerator:
     
     def _get_grades_table_style(self) -> TableStyle:
         """Get the table style for grades tables."""
-        return TableStyle([
-            # Header row styling
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            
-            # Data rows styling (excluding summary row)
-            ('BACKGROUND', (0, 1), (-1, -2), colors.white),
-            ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -2), 10),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            # Summary row styling (last row)
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 10),
-            
-            # Grid styling
-            ('BOX', (0, 0), (-1, -1), 0.8, colors.black),  # Thick outer border
-            ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.black),  # Thin inner lines
-            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),  # Double line above summary
-            
-            # Text alignment
-            ('ALIGN', (0, 1), (0, -2), 'LEFT'),  # Left align course titles
-            ('ALIGN', (0, -1), (0, -1), 'LEFT'),  # Left align summary row label
-        ])
+        return _GRADES_TABLE_STYLE
+
+
+# Footer text is identical on every page of every transcript
+_FOOTER_LINES = (
+    "École normale supérieure de Rennes",
+    "Campus de Ker lann, 11 Av. Robert Schuman, 35170 Bruz",
+    "+33  (0)2 99 05 93 00"
+)
 
 
 class PDFFooterGenerator:
     """Generates PDF footers."""
-    
+
     @staticmethod
     def add_footer(canvas, doc):
         """Add footer to each page."""
         canvas.saveState()
-        
-        # Footer text
-        footer_text = [
-            "École normale supérieure de Rennes",
-            "Campus de Ker lann, 11 Av. Robert Schuman, 35170 Bruz",
-            "+33  (0)2 99 05 93 00"
-        ]
-        
-        # Set font and color for footer
-        canvas.setFont('Helvetica', 6)
-        canvas.setFillColor(colors.grey)
-        
-        # Position footer at bottom left with proper margins
-        x = 40  # Left margin (matching document margin)
-        y = 30  # Bottom margin
-        
-        for i, line in enumerate(footer_text):
-            canvas.drawString(x, y - (i * 12), line)
-        
+
+        # One text object batches all lines into a single content-stream
+        # block instead of a drawString (with its own positioning operators)
+        # per line. Position: bottom left, matching the document margin.
+        footer = canvas.beginText(40, 30)
+        footer.setFont('Helvetica', 6)
+        footer.setFillColor(colors.grey)
+        footer.setLeading(12)
+        for line in _FOOTER_LINES:
+            footer.textLine(line)
+        canvas.drawText(footer)
+
         canvas.restoreState()
 
 
@@ -321,33 +369,67 @@ class TranscriptPDFGenerator:
     """Main PDF generator for student transcripts."""
     
     def __init__(self):
-        self.style_manager = PDFStyleManager()
+        self.style_manager = _get_style_manager()
         self.header_generator = PDFHeaderGenerator(self.style_manager)
         self.table_generator = PDFTableGenerator()
         self.footer_generator = PDFFooterGenerator()
         self.grade_converter = GradeConverter()
     
-    def generate_transcript(self, formatted_texts: Dict[str, str], 
-                          student_data: Dict[str, Any], 
-                          grades_data: Dict[str, List[float]], 
-                          output_filename: str,
-                          subject_rankings: Dict[str, int] = None) -> str:
+    def prepare(self, yearname: str):
+        """
+        Partially evaluate the generator for a batch with a fixed year name.
+
+        The header subtitle is derived from the year name, which is constant
+        across a batch, so it is formatted once here instead of per student.
+
+        Args:
+            yearname: Year/program name shown in every header subtitle
+
+        Returns:
+            Callable with the same signature as generate_transcript that
+            reuses the pre-formatted subtitle
+        """
+        subtitle_text = self.header_generator.text_formatter.format_ordinal_numbers(yearname)
+        # The signature date is the same for every PDF of the run
+        today_str = datetime.now().strftime('%B %d, %Y')
+
+        def render(formatted_texts, student_data, grades_data, output_filename,
+                   subject_rankings=None):
+            return self.generate_transcript(
+                formatted_texts, student_data, grades_data, output_filename,
+                subject_rankings, subtitle_text=subtitle_text, today_str=today_str)
+
+        return render
+
+    def generate_transcript(self, formatted_texts: Dict[str, str],
+                          student_data: Dict[str, Any],
+                          grades_data: Dict[str, List[float]],
+                          output_filename: Any,
+                          subject_rankings: Dict[str, int] = None,
+                          subtitle_text: Optional[str] = None,
+                          today_str: Optional[str] = None) -> Optional[str]:
         """
         Generate a complete student transcript PDF.
-        
+
         Args:
             formatted_texts: Dictionary of formatted text templates
             student_data: Student and author information
             grades_data: Grades information
-            output_filename: Output PDF filename
+            output_filename: Output PDF filename, or a writable binary stream
             subject_rankings: Optional dictionary with student rankings per subject
-            
+            subtitle_text: Pre-formatted header subtitle (see prepare)
+            today_str: Pre-formatted signature date (computed here when
+                       not provided; see prepare)
+
         Returns:
-            Path to the generated PDF file
+            Path to the generated PDF file, or None when writing to a stream
         """
-        # Create document
+        # Build into memory and flush in a single write: ReportLab issues many
+        # small writes during layout when handed a path, and a buffer also lets
+        # server callers stream the PDF without touching disk at all
+        buffer = io.BytesIO()
         doc = SimpleDocTemplate(
-            output_filename, 
+            buffer,
             pagesize=A4,
             rightMargin=36, 
             leftMargin=36,
@@ -359,7 +441,7 @@ class TranscriptPDFGenerator:
         story = []
         
         # Add header
-        header = self.header_generator.create_header(student_data)
+        header = self.header_generator.create_header(student_data, subtitle_text=subtitle_text)
         if isinstance(header, list):
             story.extend(header)
         else:
@@ -407,15 +489,22 @@ class TranscriptPDFGenerator:
             story.append(Paragraph(formatted_texts['outro'], self.style_manager.get_style('body')))
         
         # Add signature area
-        signature_text = f"{datetime.now().strftime('%B %d, %Y')}"
-        story.append(Paragraph(signature_text, self.style_manager.get_style('body')))
+        if today_str is None:
+            today_str = datetime.now().strftime('%B %d, %Y')
+        story.append(Paragraph(today_str, self.style_manager.get_style('body')))
         
         # Build PDF with footer
-        doc.build(story, 
-                 onFirstPage=self.footer_generator.add_footer, 
+        doc.build(story,
+                 onFirstPage=self.footer_generator.add_footer,
                  onLaterPages=self.footer_generator.add_footer)
-        
-        return output_filename
+
+        if isinstance(output_filename, (str, os.PathLike)):
+            with open(output_filename, 'wb') as output_file:
+                output_file.write(buffer.getvalue())
+            return output_filename
+
+        output_filename.write(buffer.getvalue())
+        return None
     
     def validate_inputs(self, formatted_texts: Dict[str, str], 
                        student_data: Dict[str, Any], 
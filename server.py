@@ -1,98 +1,222 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request
+from io import BytesIO
+from werkzeug.exceptions import HTTPException
+import base64
+import concurrent.futures
+import gzip
+import hashlib
 import json
-from api.single import TranscriptGenerator as SingleTranscriptGenerator
+import os
+import traceback
 from api.batch import BatchTranscriptGenerator
-from flask_cors import CORS
-import yaml
-from io import BytesIO
+from data_loader import DataLoader
 
 app = Flask(__name__)
 
-# Enable CORS for the Flask app
-CORS(app)
+# Reject oversized or malformed uploads before any parser runs: Werkzeug
+# enforces the whole-request ceiling (413) while the request is still being
+# read, the per-field cap keeps megabyte blobs out of the YAML/JSON parsers,
+# and the xlsx magic check stops pandas from opening junk bytes.
+app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024
+_MAX_CONFIG_FIELD_BYTES = 1024 * 1024
+_XLSX_MAGIC = b'PK\x03\x04'
+
+# Enable CORS for the Flask app. flask-cors re-matches its rule table on
+# every response; this API allows every origin, so three constant headers
+# from an after_request hook do the same job without the per-response
+# matching (preflight OPTIONS goes through here too).
+@app.after_request
+def _add_cors_headers(response):
+    headers = response.headers
+    headers['Access-Control-Allow-Origin'] = '*'
+    headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    headers['Access-Control-Allow-Headers'] = ('Content-Type, Authorization, '
+                                               'X-Requested-With, Accept, Origin')
+    return response
+
+
+# Responses worth compressing are the JSON envelopes carrying base64 PDF/ZIP
+# payloads; base64 text shrinks by roughly a third even at the fastest gzip
+# level, a straight win on response bytes for one cheap pass over the body.
+_COMPRESS_MIN_SIZE = 1024
+
+
+@app.after_request
+def _gzip_large_json(response):
+    if (response.status_code == 200
+            and response.mimetype == 'application/json'
+            and not response.direct_passthrough
+            and 'gzip' in request.headers.get('Accept-Encoding', '')):
+        body = response.get_data()
+        if len(body) >= _COMPRESS_MIN_SIZE:
+            # Level 1: base64's redundancy gives most of the ratio already,
+            # so higher levels trade CPU for little extra shrinkage
+            response.set_data(gzip.compress(body, compresslevel=1))
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+# JSON responses carry base64 PDFs/ZIPs, so encode speed matters: orjson
+# serializes straight to bytes several times faster than the stdlib encoder
+# behind jsonify. Same optional-dependency fallback as data_loader.
+try:
+    import orjson
 
-# Initialize generators
-single_generator = SingleTranscriptGenerator()
+    def _jsonify(payload, status=200):
+        """jsonify stand-in that serializes with orjson."""
+        return app.response_class(orjson.dumps(payload), status=status,
+                                  mimetype='application/json')
+except ImportError:
+    def _jsonify(payload, status=200):
+        # Build the response directly rather than via jsonify, which needs
+        # an app context and would break the module-import-time _RESP_*
+        # constants below
+        return app.response_class(json.dumps(payload).encode(), status=status,
+                                  mimetype='application/json')
+
+# The common rejection responses never change, so build them once at import;
+# bad requests then cost a constant return instead of a dict allocation and
+# a serializer pass each time
+_RESP_MISSING_FIELDS = _jsonify({"error": "Missing required fields"}, 400)
+_RESP_UNSUPPORTED_MEDIA = _jsonify(
+    {"error": "Unsupported Media Type: Content-Type must be multipart/form-data"}, 415)
+_RESP_FIELD_TOO_LARGE = _jsonify(
+    {"error": "Uploaded config file exceeds the per-field size limit"}, 413)
+_RESP_NOT_XLSX = _jsonify(
+    {"error": "students_excel is not an .xlsx workbook"}, 400)
+
+# Initialize generators (DataLoader is stateless, so one shared instance)
 batch_generator = BatchTranscriptGenerator()
+_data_loader = DataLoader()
+
+# Single-transcript rendering is CPU-bound (ReportLab layout), so running it
+# inline would hold the GIL and serialize concurrent /api/single requests.
+# Requests are instead submitted to a process pool whose workers build their
+# generator (and warm ReportLab) once. Built lazily so importing server.py —
+# e.g. for the docs route or tests — doesn't fork worker processes.
+_EXECUTOR = None
+
+
+def _init_single_worker():
+    """Warm a pool worker: import ReportLab and build the shared generator."""
+    import pdf_generator
+    pdf_generator.warm_up()
+    from api.single import _get_generator
+    _get_generator()
+
+
+def _run_single(student_info, author_info, grades):
+    """Render one transcript inside a pool worker (module-level: picklable)."""
+    from api.single import _get_generator
+    return _get_generator().generate_single_transcript_from_data(
+        student_info, author_info, grades
+    )
+
+
+def _get_executor():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = concurrent.futures.ProcessPoolExecutor(
+            initializer=_init_single_worker)
+    return _EXECUTOR
+
+# The docs page is static: read and encode it once at import instead of a
+# file read per request (the deployment health check hits '/' constantly)
+_INDEX_HTML_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+try:
+    with open(_INDEX_HTML_PATH, 'rb') as index_file:
+        _INDEX_HTML = index_file.read()
+    # Strong validator computed once; lets repeat visitors revalidate with a
+    # 304 instead of re-downloading the page (blake2b is cheaper than sha256)
+    _INDEX_ETAG = '"' + hashlib.blake2b(_INDEX_HTML, digest_size=16).hexdigest() + '"'
+except OSError:
+    _INDEX_HTML = None
+    _INDEX_ETAG = None
 
 @app.route('/')
 def home():
-    return "Welcome to the ENS Grading API!"
+    if _INDEX_HTML is None:
+        return "Welcome to the ENS Grading API!"
+    if request.headers.get('If-None-Match') == _INDEX_ETAG:
+        return Response(status=304, headers={'ETag': _INDEX_ETAG})
+    return Response(_INDEX_HTML, mimetype='text/html',
+                    headers={'ETag': _INDEX_ETAG,
+                             'Cache-Control': 'public, max-age=300'})
 
 @app.route('/api/single', methods=['POST'])
 def generate_single():
     try:
-        # Check if the request is multipart/form-data
-        if request.content_type.startswith('multipart/form-data'):
+        # Check if the request is multipart/form-data. Read the raw environ
+        # value once: the content_type property re-parses the header per
+        # access, and this also survives requests with no Content-Type at all
+        content_type = request.environ.get('CONTENT_TYPE') or ''
+        if content_type.startswith('multipart/form-data'):
             student_info_file = request.files.get('student_info')
             author_info_file = request.files.get('author_info')
             grades_file = request.files.get('grades')
 
             if not (student_info_file and author_info_file and grades_file):
-                return jsonify({"error": "Missing required fields"}), 400
-
-            # Create temporary files to use with the data loader
-            import tempfile
-            import os
-            
-            # For student info
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.yaml') as temp_student:
-                temp_student.write(student_info_file.read())
-                student_info_path = temp_student.name
-            
-            # For author info
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.yaml') as temp_author:
-                temp_author.write(author_info_file.read())
-                author_info_path = temp_author.name
-            
-            # For grades
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as temp_grades:
-                temp_grades.write(grades_file.read())
-                grades_path = temp_grades.name
-            
-            try:
-                # Use the DataLoader to load files (same way as in main.py)
-                from data_loader import DataLoader
-                data_loader = DataLoader()
-                
-                student_info = data_loader.load_student_info(student_info_path)
-                author_info = data_loader.load_author_info(author_info_path)
-                grades = data_loader.load_grades_data(grades_path)
-            finally:
-                # Clean up temporary files
-                for path in [student_info_path, author_info_path, grades_path]:
-                    if os.path.exists(path):
-                        os.remove(path)
-
-            # Generate the transcript
-            pdf_content, filename, student_info = single_generator.generate_single_transcript_from_data(
-                student_info, author_info, grades
-            )
+                return _RESP_MISSING_FIELDS
+
+            # Read each field with a hard cap so an oversized blob is
+            # rejected before any parser touches it
+            student_raw = student_info_file.read(_MAX_CONFIG_FIELD_BYTES + 1)
+            author_raw = author_info_file.read(_MAX_CONFIG_FIELD_BYTES + 1)
+            grades_raw = grades_file.read(_MAX_CONFIG_FIELD_BYTES + 1)
+            if max(len(student_raw), len(author_raw), len(grades_raw)) > _MAX_CONFIG_FIELD_BYTES:
+                return _RESP_FIELD_TOO_LARGE
+
+            # Parse the uploads straight from memory — no temp-file
+            # write/read/delete round-trip per field
+            student_info = _data_loader.load_student_info_stream(BytesIO(student_raw))
+            # Author info repeats across requests, so use the content-keyed cache
+            author_info = _data_loader.load_author_info_cached(author_raw)
+            grades = _data_loader.load_grades_stream(BytesIO(grades_raw))
+
+            # Generate the transcript in a pool worker so the request thread
+            # only waits instead of pegging a core under the GIL
+            pdf_content, filename, student_info = _get_executor().submit(
+                _run_single, student_info, author_info, grades
+            ).result()
 
-            # Convert binary PDF content to base64 string for JSON response
-            import base64
-            base64_pdf = base64.b64encode(pdf_content).decode('utf-8')
-            
             # Format student name for the response
             student_name = f"{student_info['firstname']} {student_info['name']}" if isinstance(student_info, dict) else ""
-            
+
+            # Clients that accept application/pdf get the raw bytes — no 33%
+            # base64 inflation and no JSON pass over megabytes of payload
+            if 'application/pdf' in request.headers.get('Accept', ''):
+                return Response(pdf_content, mimetype='application/pdf', headers={
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'X-Filename': filename,
+                    'X-Student-Name': student_name,
+                })
+
+            # Convert binary PDF content to base64 string for JSON response
+            # base64 output is pure ASCII; skip the UTF-8 validation pass
+            base64_pdf = base64.b64encode(pdf_content).decode('ascii')
+
             # Return the PDF content as a base64 string with the expected field names
-            return jsonify({
+            return _jsonify({
                 "success": True,
                 "filename": filename,
                 "pdf_data": base64_pdf,  # Changed from pdf_content to pdf_data to match client expectations
                 "student_name": student_name,  # Added student_name field
                 "student_info": student_info  # Keep the original field too
-            }), 200
+            })
 
-        return jsonify({"error": "Unsupported Media Type: Content-Type must be multipart/form-data"}), 415
+        return _RESP_UNSUPPORTED_MEDIA
 
+    except HTTPException:
+        # Let Flask render its own errors (e.g. the 413 from the request
+        # size ceiling) instead of folding them into a 500
+        raise
     except Exception as e:
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in generate_single: {str(e)}")
-        print(error_detail)
-        return jsonify({"error": str(e), "detail": error_detail}), 500
+        # Log the full traceback server-side; only debug runs ship it to the
+        # client, so error storms don't pay for a formatted stack per response
+        app.logger.exception("Error in generate_single")
+        detail = traceback.format_exc() if app.debug else None
+        return _jsonify({"error": str(e), "detail": detail}, 500)
 
 @app.route('/api/batch', methods=['POST'])
 def generate_batch():
@@ -102,53 +226,52 @@ def generate_batch():
         author_info_file = request.files.get("author_info")
 
         if not (excel_file and author_info_file):
-            return jsonify({"error": "Missing required fields"}), 400
-        
-        # Process the uploaded files
-        import tempfile
-        import os
+            return _RESP_MISSING_FIELDS
         
-        # Read the files' contents
+        # Read the Excel upload and parse the author YAML straight from its
+        # stream — no temp file
         excel_data = excel_file.read()
-        author_file_data = author_info_file.read()
-        
-        # Create a temporary file for the author info
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.yaml') as temp_author:
-            temp_author.write(author_file_data)
-            author_path = temp_author.name
-        
-        try:
-            # Load author info using DataLoader
-            from data_loader import DataLoader
-            data_loader = DataLoader()
-            author_info = data_loader.load_author_info(author_path)
-            
-            # Generate the transcripts with bytes content and parsed author info
-            zip_content, zip_filename, generated_count, student_names = batch_generator.generate_batch_transcripts_from_data(
-                excel_data, author_info['author']  # Pass author info dict
-            )
-        finally:
-            # Clean up temporary files
-            for path in [author_path]:
-                if os.path.exists(path):
-                    os.remove(path)
+        if not excel_data.startswith(_XLSX_MAGIC):
+            return _RESP_NOT_XLSX
+        author_raw = author_info_file.read(_MAX_CONFIG_FIELD_BYTES + 1)
+        if len(author_raw) > _MAX_CONFIG_FIELD_BYTES:
+            return _RESP_FIELD_TOO_LARGE
+        author_info = _data_loader.load_author_info_cached(author_raw)
+
+        # Generate the transcripts with bytes content and parsed author
+        # info. No pool submission here: the batch generator already farms
+        # the per-student rendering out to its own worker pool.
+        zip_content, zip_filename, student_names, generated_count = batch_generator.generate_batch_transcripts_from_data(
+            excel_data, author_info['author']  # Pass author info dict
+        )
+
+        # Clients that accept application/zip get the raw archive instead of
+        # the base64-in-JSON wrapping
+        if 'application/zip' in request.headers.get('Accept', ''):
+            return Response(zip_content, mimetype='application/zip', headers={
+                'Content-Disposition': f'attachment; filename="{zip_filename}"',
+                'X-Filename': zip_filename,
+                'X-Generated-Count': str(generated_count),
+            })
 
         # Convert the ZIP content to base64 for JSON response
-        import base64
-        zip_base64 = base64.b64encode(zip_content).decode('utf-8')
-        
+        # base64 output is pure ASCII; skip the UTF-8 validation pass
+        zip_base64 = base64.b64encode(zip_content).decode('ascii')
+
         # Return a JSON response with the base64 encoded ZIP data
-        return jsonify({
+        return _jsonify({
             "success": True,
             "filename": zip_filename,
             "zip_data": zip_base64,
             "generated_count": generated_count,
             "student_names": student_names  # Include student names in the response
-        }), 200
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"Error in generate_batch: {str(e)}")
-        print(error_detail)
-        return jsonify({"error": str(e), "detail": error_detail}), 500
\ No newline at end of file
+        # Log the full traceback server-side; only debug runs ship it to the
+        # client, so error storms don't pay for a formatted stack per response
+        app.logger.exception("Error in generate_batch")
+        detail = traceback.format_exc() if app.debug else None
+        return _jsonify({"error": str(e), "detail": detail}, 500)
\ No newline at end of file
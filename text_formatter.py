@@ -11,38 +11,120 @@ Author: ENS Transcript Generator
 Date: September 2025
 """
 
+import functools
 import re
 from typing import Dict, Any
 
+# Compiled once at import: both patterns run for every template of every
+# transcript, so this avoids the per-call pattern lookup in re's cache
+_ORDINAL_RE = re.compile(r'(\d+)(st|nd|rd|th)\b')
+_PLACEHOLDER_RE = re.compile(r'<([^>]+)>')
+# Fused pattern so each template is scanned exactly once for both
+# placeholders and bare ordinals instead of in two passes
+_PLACEHOLDER_OR_ORDINAL_RE = re.compile(r'<([^>]+)>|(\d+)(st|nd|rd|th)\b')
+
+# Highlight markup built once; the default open tag covers virtually every
+# call so the f-string in the hot loop only runs for custom colors
+_DEFAULT_HIGHLIGHT_COLOR = "#2259af"
+_FONT_OPEN_DEFAULT = f'<font color={_DEFAULT_HIGHLIGHT_COLOR}>'
+_FONT_CLOSE = '</font>'
+
+# Render plans keyed by template string. Templates are identical across the
+# students of a batch, so each one is regex-parsed exactly once and rendering
+# becomes dict lookups plus a join.
+_TEMPLATE_PLAN_CACHE: Dict[str, list] = {}
+
+
+# Sentinel distinguishing "placeholder not found" from legitimate falsy values
+_MISSING = object()
+
+
+def _flatten_data(data: Dict[str, Any], prefix: str = '',
+                  out: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Flatten a nested data dict into dotted-path keys.
+
+    {"student": {"name": "John"}} becomes {"student": {...}, "student.name":
+    "John"}, so each placeholder substitution is a single dict.get instead of
+    a key-by-key walk. Dict nodes are kept under their own path to preserve
+    the behaviour of placeholders that point at a whole section.
+    """
+    if out is None:
+        out = {}
+    for key, value in data.items():
+        path = prefix + key
+        out[path] = value
+        if isinstance(value, dict):
+            _flatten_data(value, path + '.', out)
+    return out
+
+
+def _compile_template(text: str) -> list:
+    """
+    Parse a template into a list of (literal, op, payload) segments.
+
+    op is 'ph' for a placeholder (payload: (dotted key, original token)),
+    'ord' for a bare ordinal (payload: pre-built superscript string), or
+    None for the trailing literal.
+    """
+    # Static boilerplate: without a '<' or a digit neither alternative of the
+    # fused pattern can match, so skip the regex scan outright
+    if '<' not in text and not any(c.isdigit() for c in text):
+        return [(text, None, None)]
+
+    plan = []
+    pos = 0
+    for match in _PLACEHOLDER_OR_ORDINAL_RE.finditer(text):
+        literal = text[pos:match.start()]
+        if match.group(1) is not None:
+            plan.append((literal, 'ph', (match.group(1), match.group(0))))
+        else:
+            plan.append((literal, 'ord', f'{match.group(2)}<sup>{match.group(3)}</sup>'))
+        pos = match.end()
+    plan.append((text[pos:], None, None))
+    return plan
+
 
 class TextFormatter:
     """Handles text formatting operations for transcript generation."""
     
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def format_ordinal_numbers(text: str) -> str:
         """
         Format ordinal numbers (1st, 2nd, 3rd, 11th, etc.) with superscript suffixes.
-        
+
+        Inputs are short placeholder values (names, dates, year names) that
+        repeat heavily across the templates of a batch, so results are
+        memoized and repeat calls become a dict lookup instead of a regex scan.
+
         Args:
             text: Input text containing ordinal numbers
-            
+
         Returns:
             Text with ordinal suffixes formatted as superscript
-            
+
         Example:
             "26th of September" -> "26<sup>th</sup> of September"
         """
+        # No digit means no ordinal: a linear byte scan beats running the
+        # regex engine over the digit-less majority (names, cities, titles)
+        if not any(c.isdigit() for c in text):
+            return text
+
         def replace_ordinal(match):
             number = match.group(1)
             suffix = match.group(2)
             return f'{number}<sup>{suffix}</sup>'
-        
+
         # Pattern to match ordinal numbers: digits followed by st, nd, rd, or th
-        formatted_text = re.sub(r'(\d+)(st|nd|rd|th)\b', replace_ordinal, text)
+        formatted_text = _ORDINAL_RE.sub(replace_ordinal, text)
         return formatted_text
     
     @staticmethod
-    def format_text_with_data(text: str, data: Dict[str, Any], highlight_color: str = "#2259af") -> str:
+    def format_text_with_data(text: str, data: Dict[str, Any],
+                              highlight_color: str = _DEFAULT_HIGHLIGHT_COLOR,
+                              _flat_data: Dict[str, Any] = None) -> str:
         """
         Format text by replacing placeholders with actual data and highlighting dynamic content.
         
@@ -50,7 +132,9 @@ class TextFormatter:
             text: Template text with placeholders in format <section.field>
             data: Dictionary containing the data to replace placeholders
             highlight_color: Hex color code for highlighting dynamic content
-            
+            _flat_data: Pre-flattened dotted-key view of data, passed by
+                        format_all_templates so it is built once per student
+
         Returns:
             Formatted text with placeholders replaced and dynamic content highlighted
             
@@ -59,25 +143,44 @@ class TextFormatter:
             Data: {"student": {"name": "John Doe", "dob": "1st of January 2000"}}
             Output: "Student <font color=#2259af>John Doe</font> was born on <font color=#2259af>1<sup>st</sup> of January 2000</font>"
         """
-        def replace_placeholder(match):
-            placeholder = match.group(1)  # Get the content between < and >
-            keys = placeholder.split('.')
-            
-            # Navigate through nested dictionary
-            value = data
-            for key in keys:
-                if isinstance(value, dict) and key in value:
-                    value = value[key]
+        plan = _TEMPLATE_PLAN_CACHE.get(text)
+        if plan is None:
+            plan = _TEMPLATE_PLAN_CACHE[text] = _compile_template(text)
+
+        # Fully literal template: nothing to substitute
+        if len(plan) == 1:
+            return text
+
+        font_open = (_FONT_OPEN_DEFAULT if highlight_color == _DEFAULT_HIGHLIGHT_COLOR
+                     else f'<font color={highlight_color}>')
+
+        if _flat_data is None:
+            _flat_data = _flatten_data(data)
+        flat_get = _flat_data.get
+
+        parts = []
+        for literal, op, payload in plan:
+            if literal:
+                parts.append(literal)
+            if op == 'ph':
+                # Single flat lookup instead of a nested dict walk
+                key, original = payload
+                value = flat_get(key, _MISSING)
+                if value is _MISSING:
+                    parts.append(original)  # Keep original placeholder if not found
                 else:
-                    return match.group(0)  # Return original placeholder if not found
-            
-            # Format ordinal numbers and wrap in highlight color
-            formatted_value = TextFormatter.format_ordinal_numbers(str(value))
-            return f'<font color={highlight_color}>{formatted_value}</font>'
-        
-        # Find all placeholders in format <section.field>
-        formatted_text = re.sub(r'<([^>]+)>', replace_placeholder, text)
-        return formatted_text
+                    # Format ordinal numbers and wrap in highlight color;
+                    # numeric values cannot contain ordinal suffixes, so they
+                    # skip the regex pass entirely
+                    if isinstance(value, str):
+                        formatted_value = TextFormatter.format_ordinal_numbers(value)
+                    else:
+                        formatted_value = str(value)
+                    parts.append(font_open + formatted_value + _FONT_CLOSE)
+            elif op == 'ord':
+                parts.append(payload)
+
+        return ''.join(parts)
     
     @classmethod
     def format_all_templates(cls, student_data: Dict[str, Any], 
@@ -93,10 +196,14 @@ class TextFormatter:
             Dictionary mapping template names to formatted text strings
         """
         formatted_texts = {}
-        
+
+        # Flatten once per student: every template shares the same data
+        flat_data = _flatten_data(student_data)
+
         for template_name, template_text in text_templates.items():
-            formatted_texts[template_name] = cls.format_text_with_data(template_text, student_data)
-        
+            formatted_texts[template_name] = cls.format_text_with_data(
+                template_text, student_data, _flat_data=flat_data)
+
         return formatted_texts
     
     @staticmethod